@@ -1,6 +1,88 @@
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import numbers
+import os
+
+import numpy as np
 import pandas as pd 
 import yaml
 
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; the pandas implementation is used instead
+    njit = None
+
+
+# Compiled kernels
+
+@functools.lru_cache(maxsize=None)
+def make_concordance_kernel(validity_duration):
+    """
+    Returns the compiled version of the per-indicator calculation in `calc_days_not_concordant` for a given validity 
+    duration. The validity duration is a compile-time constant of the kernel, and the kernel is cached per validity 
+    duration, so indicators with the same validity duration share one compiled kernel. The kernels are compiled once 
+    per process and not cached on disk: Numba cannot reliably load several cached closures of the same function.
+
+    Parameters
+    ----------
+    validity_duration : float
+        The validity duration in days.
+
+    Returns
+    -------
+    callable or None
+        The compiled kernel, or None if Numba is not available.
+    """
+    if njit is None:
+        return None
+
+    @njit(nogil=True)
+    def concordance_kernel(patient_bounds, dates, activity, has_date, evaluation_start_date, evaluation_length):
+        """
+        Calculates the number of non-concordant days in the evaluation period for each patient, in a single loop over 
+        the sorted rows. The kernel releases the GIL, so indicators can be processed in parallel threads (see `n_jobs`).
+
+        Parameters
+        ----------
+        patient_bounds : numpy.ndarray
+            1D int array with the first row of each patient, followed by the total number of rows.
+        dates : numpy.ndarray
+            1D int64 array with the activity dates as days since epoch, sorted by patient and date.
+        activity : numpy.ndarray
+            1D boolean array indicating whether the indicator was met on the row's date.
+        has_date : numpy.ndarray
+            1D boolean array indicating whether the row has a date.
+        evaluation_start_date : int
+            The start date of the evaluation period as days since epoch.
+        evaluation_length : float
+            Duration of the evaluation period in days.
+
+        Returns
+        -------
+        numpy.ndarray
+            1D float array with the number of non-concordant days for each patient, NaN for patients without activity.
+        """
+        n_patients = len(patient_bounds) - 1
+        dummy_date = evaluation_start_date - validity_duration
+        day_after_end_date = evaluation_start_date + evaluation_length
+        days_not_concordant = np.empty(n_patients)
+        for p in range(n_patients):
+            prev_date = dummy_date
+            days = 0.0
+            has_activity = False
+            for i in range(patient_bounds[p], patient_bounds[p + 1]):
+                if activity[i]:
+                    has_activity = True
+                    if has_date[i]:
+                        date = min(max(float(dates[i]), dummy_date), day_after_end_date)
+                        days += max(date - prev_date - validity_duration, 0.0)
+                        prev_date = date
+            days += max(day_after_end_date - prev_date - validity_duration, 0.0)
+            days_not_concordant[p] = days if has_activity else np.nan
+        return days_not_concordant
+
+    return concordance_kernel
+
 
 # Main functions
 
@@ -30,9 +112,9 @@ def prepare_df_for_concordance_ratio(df, validity_duration, evaluation_start_dat
         DataFrame containing patient_col, date_col, and binary column(s) for each indicator of interest.
     validity_duration : float
         The length of the validity period (in days).
-    evaluation_start_date : pandas.Timestamp
+    evaluation_start_date : numpy.datetime64 or pandas.Timestamp
         The start date of the evaluation period.
-    evaluation_end_date : pandas.Timestamp
+    evaluation_end_date : numpy.datetime64 or pandas.Timestamp
         The end date of the evaluation period.
     patient_col : str
         Name of the column containing (masked) patient identifiers.
@@ -48,7 +130,7 @@ def prepare_df_for_concordance_ratio(df, validity_duration, evaluation_start_dat
     dummy_date = evaluation_start_date - pd.Timedelta(days=validity_duration)
 
     # Dataframe with most recent activitiy date before the start of the evaluation period for each patient
-    last_date_before_evaluation = df[df[date_col] < evaluation_start_date].groupby(patient_col)[date_col].max().reset_index()
+    last_date_before_evaluation = df[df[date_col] < evaluation_start_date].groupby(patient_col, observed=True)[date_col].max().reset_index()
 
     # If the last test day before the evaluation falls before dummy date, replace by dummy date instead    
     last_date_before_evaluation[date_col] = last_date_before_evaluation[date_col].clip(lower=dummy_date)
@@ -86,8 +168,8 @@ def calc_ratio_of_concordant_period(df, indicator, evaluation_start_date, evalua
         and activity types. The DataFrame can have multiple rows (i.e., dates) per patient.
     indicator : str
         The indicator for which the concordance score will be calculated.
-    evaluation_start_date : str
-        The start date of the evaluation period in 'YYYY-MM-DD' format.
+    evaluation_start_date : numpy.datetime64 or pandas.Timestamp
+        The start date of the evaluation period, as returned by `validate_inputs`.
     evaluation_length : int
         Duration of the evaluation period in days.
     validity_duration : float
@@ -105,38 +187,219 @@ def calc_ratio_of_concordant_period(df, indicator, evaluation_start_date, evalua
     # Calculate evaluation end date
     evaluation_end_date = evaluation_start_date + pd.Timedelta(days=evaluation_length - 1) 
         
-    # Filter on specific indicator and only keep relevant columns
-    df_filtered = df[df[indicator] == 1][[date_col, indicator, patient_col]]
+    # Filter on specific indicator (rows without a patient identifier are skipped) and only keep relevant columns
+    df_filtered = df[(df[indicator] == 1) & df[patient_col].notna()][[date_col, indicator, patient_col]]
 
     # Prepare dataframe for calculating the ratio by only keeping the dates in the evaluation period + one test date before the evaluation start date
     df_filtered = prepare_df_for_concordance_ratio(df_filtered, validity_duration, evaluation_start_date, evaluation_end_date, patient_col, date_col)
 
+    col = 'concordance_{}'.format(indicator)
+
     # Shift the date_col to get the 'prev_date' for each patient
-    df_filtered['prev_date'] = df_filtered.groupby(patient_col)[date_col].shift(1)
+    df_filtered['prev_date'] = df_filtered.groupby(patient_col, sort=False, observed=True)[date_col].shift(1)
 
     # Drop rows where 'prev_date' is NaT; these are the first rows of each group
     df_filtered = df_filtered.dropna(subset=['prev_date'])
 
-    # Calculate days between two activities
-    df_filtered['days_between_activities'] = (df_filtered[date_col] - df_filtered['prev_date']).dt.total_seconds() / (24 * 3600)
-
-    # Subtract the validity duration from each time between two activities 
-    df_filtered['days_not_concordant'] = df_filtered['days_between_activities'] - validity_duration
+    # Calculate days between two activities (in day units, so no conversion via seconds is needed)
+    days_between_activities = (df_filtered[date_col].values - df_filtered['prev_date'].values) / np.timedelta64(1, 'D')
 
-    # Ensure that 'days_not_concordant' does not go below 0 (this happens when duration between two tests is shorter than the maximum coverage duration of the test)
-    df_filtered['days_not_concordant'] = df_filtered['days_not_concordant'].clip(lower=0)
+    # Subtract the validity duration from each time between two activities and ensure that 'days_not_concordant' 
+    # does not go below 0 (this happens when duration between two tests is shorter than the maximum coverage duration of the test)
+    df_filtered['days_not_concordant'] = np.maximum(days_between_activities - validity_duration, 0)
 
-    # Calculate ratio of coverage 
-    df_filtered['concordance_{}'.format(indicator)] = (evaluation_length - df_filtered.groupby(patient_col)['days_not_concordant'].transform('sum')) / evaluation_length
+    # Sum the days not concordant for each patient
+    sums = df_filtered.groupby(patient_col, sort=False, observed=True)['days_not_concordant'].sum()
 
-    # Return dataframe with concordance score for each patient
-    df_score = df_filtered.drop_duplicates(keep='first', subset=patient_col)[[patient_col, 'concordance_{}'.format(indicator)]]
+    # Calculate ratio of coverage and return dataframe with concordance score for each patient
+    df_score = sums.rename(col).reset_index()
+    df_score[col] = (evaluation_length - df_score[col]) / evaluation_length
 
     return df_score
 
 
+def calc_days_not_concordant(patient_ids, dates, activity_mask, validity_durations, evaluation_start_date, evaluation_length):
+    """
+    This function calculates the number of non-concordant days in the evaluation period for all indicators, using
+    NumPy arrays that are sorted once by patient and date. The indicators are processed one column at a time with 
+    1D arrays, so the memory use does not grow with the number of indicators. If Numba is available, each column is 
+    processed by a compiled kernel from `make_concordance_kernel`.
+
+    The result is identical to running `prepare_df_for_concordance_ratio` and `calc_ratio_of_concordant_period` 
+    for each indicator separately:
+    - Activity dates are clipped to the range [dummy date, day after the evaluation end date]. Dates before the dummy 
+      date or after the evaluation end date therefore never contribute to non-concordant days.
+    - For each activity, the gap to the previous activity of the same patient (or to the dummy date for the first 
+      activity) minus the validity duration is counted as non-concordant when positive.
+    - The gap between the last activity and the day after the evaluation end date is added for each patient.
+
+    Parameters
+    ----------
+    patient_ids : numpy.ndarray
+        1D array with the (masked) patient identifiers or their categorical codes, sorted so that all rows of a 
+        patient are contiguous.
+    dates : numpy.ndarray
+        1D int64 array with the activity dates as days since epoch, sorted by date within each patient. 
+        Missing dates are encoded as the minimum int64 value (NaT).
+    activity_mask : numpy.ndarray
+        2D boolean array (rows x indicators) indicating whether the indicator was met on the row's date.
+    validity_durations : numpy.ndarray
+        1D array with the validity duration (in days) for each indicator.
+    evaluation_start_date : int
+        The start date of the evaluation period as days since epoch.
+    evaluation_length : int
+        Duration of the evaluation period in days.
+
+    Returns
+    -------
+    patients : numpy.ndarray
+        1D array with the unique (masked) patient identifiers, in order of appearance.
+    days_not_concordant : numpy.ndarray
+        2D float array (patients x indicators) with the number of non-concordant days. Patients without any activity 
+        for an indicator are set to NaN.
+    """
+    n_rows, n_indicators = activity_mask.shape
+
+    # Find the first row of each patient
+    patient_starts = np.flatnonzero(np.r_[True, patient_ids[1:] != patient_ids[:-1]])
+    n_patients = len(patient_starts)
+
+    # Only activities with a date are taken into account
+    has_date = dates != np.iinfo(np.int64).min
+
+    day_after_end_date = evaluation_start_date + evaluation_length
+    days_not_concordant = np.empty((n_patients, n_indicators))
+
+    # Use the compiled kernels (one per validity duration) if Numba is available
+    if njit is not None:
+        patient_bounds = np.r_[patient_starts, n_rows]
+        for k in range(n_indicators):
+            concordance_kernel = make_concordance_kernel(float(validity_durations[k]))
+            days_not_concordant[:, k] = concordance_kernel(patient_bounds, dates, activity_mask[:, k], has_date, 
+                                                           evaluation_start_date, float(evaluation_length))
+        return patient_ids[patient_starts], days_not_concordant
+
+    # Patient (block number) of each row
+    row_patient = np.repeat(np.arange(n_patients), np.diff(np.r_[patient_starts, n_rows]))
+    active = np.empty(n_rows, dtype=bool)
+
+    for k in range(n_indicators):
+        validity_duration = validity_durations[k]
+
+        # Formulate dummy date, which is set to the evaluation_start_date minus the validity_duration
+        dummy_date = evaluation_start_date - validity_duration
+
+        # Rows with an activity for this indicator; clip dates to [dummy date, day after end date]
+        np.logical_and(activity_mask[:, k], has_date, out=active)
+        rows = np.flatnonzero(active)
+        rows_patient = row_patient[rows]
+        dates_clipped = np.clip(dates[rows], dummy_date, day_after_end_date).astype(float)
+
+        # First and last activity of each patient
+        is_first = np.ones(len(rows), dtype=bool)
+        is_first[1:] = rows_patient[1:] != rows_patient[:-1]
+        is_last = np.ones(len(rows), dtype=bool)
+        is_last[:-1] = is_first[1:]
+
+        # Date of the previous activity of the same patient, or the dummy date if there is none
+        prev_date = np.roll(dates_clipped, 1)
+        prev_date[is_first] = dummy_date
+
+        # Days not concordant between two activities, summed per patient
+        days_between_activities = np.maximum(dates_clipped - prev_date - validity_duration, 0)
+        days = np.bincount(rows_patient, weights=days_between_activities, minlength=n_patients).astype(float)
+
+        # Add days not concordant between the last activity (or the dummy date) and the day after the evaluation end date
+        last_date = np.full(n_patients, dummy_date)
+        last_date[rows_patient[is_last]] = dates_clipped[is_last]
+        days += np.maximum(day_after_end_date - last_date - validity_duration, 0)
+
+        # Patients without any activity for an indicator do not receive a score
+        days[~np.logical_or.reduceat(activity_mask[:, k], patient_starts)] = np.nan
+        days_not_concordant[:, k] = days
+
+    return patient_ids[patient_starts], days_not_concordant
+
+
+def calc_concordance_scores(df, evaluation_start_date, evaluation_length, indicators, patient_col, date_col, validity_periods_lower, n_jobs=1):
+    """
+    This function calculates the concordance scores for a DataFrame that was validated with `validate_inputs`. 
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The validated DataFrame sorted by patient and date, as returned by `validate_inputs`.
+    evaluation_start_date : numpy.datetime64
+        The validated evaluation start date, as returned by `validate_inputs`.
+    evaluation_length : int
+        Duration of the evaluation period in days.
+    indicators : list of str
+        Validated list of indicators, as returned by `validate_inputs`.
+    patient_col : str
+        Name of the column containing (masked) patient identifiers.
+    date_col : str
+        Name of the column containing dates on which the indicator was met.
+    validity_periods_lower : dict
+        Dictionary with indicator : validity duration in days as key/value pairs, with lowercase keys.
+    n_jobs : int, optional
+        Number of threads used to calculate the concordance scores, or -1 to use all available CPUs.
+        Default: 1.
+
+    Returns
+    -------
+    df_scores_all : pandas.DataFrame
+        DataFrame with concordance scores for all requested indicators (columns) for each patient (rows), with the 
+        patient identifiers as categorical.
+    missing_dates : numpy.ndarray
+        Number of activities without a date for each indicator.
+    """
+    # Convert to NumPy arrays, with patients as categorical codes, dates as days since epoch and one boolean column per indicator
+    pids = df[patient_col].cat.codes.to_numpy()
+    dates = df[date_col].values.astype('datetime64[D]').view('i8')
+    mask = df[indicators].to_numpy() == 1
+    start_date = evaluation_start_date.view('i8')
+
+    # Count activities without a date
+    missing_dates = (mask & df[date_col].isna().to_numpy()[:, None]).sum(axis=0)
+
+    # Get the validity duration for each indicator
+    validity_durations = np.array([validity_periods_lower[indicator.lower()] for indicator in indicators], dtype=float)
+
+    # Calculate concordance scores for individual indicators
+    n_jobs = min((os.cpu_count() or 1) if n_jobs == -1 else int(n_jobs), len(indicators))
+    if n_jobs == 1:
+        patients, days_not_concordant = calc_days_not_concordant(pids, dates, mask, validity_durations, start_date, evaluation_length)
+    else:
+        # Indicators are independent, so each thread processes its own subset of indicator columns
+        indicator_chunks = np.array_split(np.arange(len(indicators)), n_jobs)
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            results = list(executor.map(
+                lambda cols: calc_days_not_concordant(pids, dates, mask[:, cols], validity_durations[cols], start_date, evaluation_length), 
+                indicator_chunks))
+        patients = results[0][0]
+        days_not_concordant = np.hstack([days for _, days in results])
+    scores = (evaluation_length - days_not_concordant) / evaluation_length
+
+    # Rows without a patient identifier (code -1) do not belong to a patient and do not receive a score
+    scores[patients == -1] = np.nan
+    patients = pd.Categorical.from_codes(patients, dtype=df[patient_col].dtype)
+
+    # Combine all scores in a single DataFrame construction; patients who did not perform any tests are kept with a NaN score
+    df_scores_all = pd.DataFrame({patient_col: patients, 
+                                  **{'concordance_{}'.format(indicator): scores[:, k] for k, indicator in enumerate(indicators)}})
+    
+    # Calculate average concordance score in case of more than one clinical indicator
+    # (NaN scores are skipped, as in pandas; patients without any score get NaN without a warning)
+    if len(indicators) > 1:
+        counts = (~np.isnan(scores)).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            df_scores_all['concordance_total'] = np.nansum(scores, axis=1) / counts
+
+    return df_scores_all, missing_dates
+
+
 def calc_concordance_with_ratio(df_, evaluation_start_date, evaluation_length, indicators, patient_col, date_col, 
-                                validity_periods=None, validity_periods_file="validity_periods.yml"): 
+                                validity_periods=None, validity_periods_file="validity_periods.yml", n_jobs=1): 
     """ 
     This function calculates the concordance score via the ratio model, as described in [$Paper Title] ($link_to__paper).
     The concordance score of a single activity is calculated as follows: 
@@ -147,9 +410,10 @@ def calc_concordance_with_ratio(df_, evaluation_start_date, evaluation_length, i
 
     Parameters
     ----------
-    df_ : pandas.DataFrame
+    df_ : pandas.DataFrame or dask.dataframe.DataFrame
         The DataFrame containing data about clinical activities, including (masked) patient IDs, dates,
-        and activity types. The DataFrame can have multiple rows (i.e., dates) per patient.
+        and activity types. The DataFrame can have multiple rows (i.e., dates) per patient. 
+        A Dask DataFrame is processed per partition with `calc_concordance_with_ratio_dask`.
     evaluation_start_date : str or pandas.Timestamp
         The start date of the evaluation period in 'YYYY-MM-DD' format.
     evaluation_length : int
@@ -168,42 +432,138 @@ def calc_concordance_with_ratio(df_, evaluation_start_date, evaluation_length, i
     validity_periods_file : str, optional
         Path to the YAML file containing validity periods.
         Default: 'validity_periods.yml'.
+    n_jobs : int, optional
+        Number of threads used to calculate the concordance scores, with the indicators divided over the threads. 
+        Use -1 to use all available CPUs.
+        Default: 1.
 
     Returns
     -------
     pandas.DataFrame
         DataFrame with concordance scores for all requested indicators (columns) for each patient (rows).
     """
-    # Copy the DataFrame to avoid modifying the original
-    df = df_.copy()
+    # Dask DataFrames are processed per partition of whole patients
+    if not isinstance(df_, pd.DataFrame) and hasattr(df_, 'map_partitions'):
+        return calc_concordance_with_ratio_dask(df_, evaluation_start_date, evaluation_length, indicators, patient_col, date_col, 
+                                                validity_periods, validity_periods_file, n_jobs)
 
     # Load and validate validity periods 
     validity_periods_lower = load_validity_periods(validity_periods, validity_periods_file)
 
     # Validate inputs
-    df, evaluation_start_date, indicators = validate_inputs(df, evaluation_start_date, evaluation_length, indicators, patient_col, date_col, validity_periods_lower)
+    df, evaluation_start_date, indicators = validate_inputs(df_, evaluation_start_date, evaluation_length, indicators, patient_col, date_col, validity_periods_lower, n_jobs)
 
-    # Calculate concordance scores for individual indicators
-    df_scores_all = pd.DataFrame(df[patient_col].unique(), columns=[patient_col]) # dataframe with all unique patients
-    
-    for indicator in indicators:
-        # Check if there are activities for this indicator without a date
-        missing_dates = df[df[indicator] == 1][date_col].isna().sum()
+    # Calculate concordance scores and report activities without a date
+    df_scores_all, missing_dates = calc_concordance_scores(df, evaluation_start_date, evaluation_length, indicators, patient_col, date_col, 
+                                                           validity_periods_lower, n_jobs)
+    print_missing_dates_warning(indicators, missing_dates, date_col)
 
-        if missing_dates > 0:
-            print(f"WARNING: The indicator '{indicator}' has {missing_dates} activities without a date in the column '{date_col}'.\n"
-                f"Activities without a date will not be included in the concordance score calculation!")
+    # Return the patient identifiers with their original dtype (categorical identifiers stay categorical)
+    if not isinstance(df_[patient_col].dtype, pd.CategoricalDtype):
+        df_scores_all[patient_col] = df_scores_all[patient_col].astype(df_scores_all[patient_col].cat.categories.dtype)
 
-        # Get the validity duration for this indicator
-        validity_duration = validity_periods_lower[indicator.lower()]
+    return df_scores_all
 
-        df_scores = calc_ratio_of_concordant_period(df, indicator, evaluation_start_date, evaluation_length, validity_duration, patient_col, date_col)
-        df_scores_all = pd.merge(df_scores_all, df_scores, on=patient_col, how='outer') # outer: keep patients who did not perform any tests
-    
-    # Calculate average concordance score in case of more than one clinical indicator
+
+def calc_concordance_with_ratio_dask(ddf, evaluation_start_date, evaluation_length, indicators, patient_col, date_col, 
+                                     validity_periods=None, validity_periods_file="validity_periods.yml", n_jobs=1, npartitions=None):
+    """
+    This function calculates the concordance score via the ratio model for a Dask DataFrame, e.g. for cohorts that 
+    are too large to process in a single pandas DataFrame or that are spread over a cluster.
+
+    All calculations are patient-local, so the data is partitioned on `patient_col` such that each partition contains 
+    all rows of a patient. The concordance scores are then calculated for every partition separately.
+
+    Parameters
+    ----------
+    ddf : dask.dataframe.DataFrame
+        The Dask DataFrame containing data about clinical activities, including (masked) patient IDs, dates,
+        and activity types. The DataFrame can have multiple rows (i.e., dates) per patient.
+    evaluation_start_date : str or pandas.Timestamp
+        The start date of the evaluation period in 'YYYY-MM-DD' format.
+    evaluation_length : int
+        Duration of the evaluation period in days.
+    indicators : list of str or str
+        List or single string indicating the indicator(s) for which to calculate the concordance score.
+    patient_col : str
+        Name of the column containing (masked) patient identifiers.
+    date_col : str
+        Name of the column containing dates on which the indicator was met.
+    validity_periods : dict or None, optional
+        Dictionary with indicator as key and validity duration in days as value. If None, data from
+        `validity_periods_file` will be used.
+        Default: None.
+    validity_periods_file : str, optional
+        Path to the YAML file containing validity periods.
+        Default: 'validity_periods.yml'.
+    n_jobs : int, optional
+        Number of threads used within each partition.
+        Default: 1.
+    npartitions : int or None, optional
+        Number of partitions after partitioning on `patient_col`. If None, Dask determines the number of partitions.
+        Default: None.
+
+    Returns
+    -------
+    pandas.DataFrame
+        DataFrame with concordance scores for all requested indicators (columns) for each patient (rows).
+    """
+    try:
+        import dask
+        import dask.dataframe as dd
+    except ImportError as e:
+        raise ImportError("Dask is required to calculate concordance scores for a Dask DataFrame. Install it with `pip install \"dask[dataframe]\"`.") from e
+
+    if not (dask.is_dask_collection(ddf) and hasattr(ddf, 'map_partitions')):
+        raise TypeError("The `ddf` parameter must be a Dask DataFrame.")
+
+    # Load validity periods once, instead of for every partition
+    validity_periods_lower = load_validity_periods(validity_periods, validity_periods_file)
+    indicators = [indicators] if isinstance(indicators, str) else indicators
+
+    # Check required columns in the DataFrame
+    missing_columns = [col for col in [patient_col, date_col] + list(indicators) if col not in ddf.columns]
+    if missing_columns:
+        raise ValueError(f"The following required columns are missing from the DataFrame: {missing_columns}")
+
+    # Count activities without a date over all partitions
+    date_missing = dd.to_datetime(ddf[date_col]).isna()
+    missing_dates = [((ddf[indicator] == 1) & date_missing).sum() for indicator in indicators]
+
+    # Rows without a patient identifier cannot be partitioned on patient; as in `calc_concordance_with_ratio`, they 
+    # are reported as a single row with NaN scores
+    patient_missing = ddf[patient_col].isna()
+    n_missing_patients = patient_missing.sum()
+    ddf = ddf[~patient_missing]
+
+    # Partition on patient, so that each partition contains all rows of a patient
+    ddf = ddf.set_index(patient_col) if npartitions is None else ddf.set_index(patient_col, npartitions=npartitions)
+
+    # Output structure of each partition
+    score_cols = ['concordance_{}'.format(indicator) for indicator in indicators]
     if len(indicators) > 1:
-        cols_with_scores = df_scores_all.columns[df_scores_all.columns.str.startswith('concordance')]
-        df_scores_all['concordance_total'] = df_scores_all[cols_with_scores].mean(axis=1)
+        score_cols.append('concordance_total')
+    meta = pd.DataFrame({patient_col: pd.Series(dtype=ddf.index.dtype), **{col: pd.Series(dtype=float) for col in score_cols}})
+
+    def calc_concordance_partition(df_partition):
+        # Partitions can be empty after repartitioning
+        if df_partition.empty:
+            return meta
+        df, start_date, indicators_ = validate_inputs(df_partition.reset_index(), evaluation_start_date, evaluation_length, indicators, 
+                                                      patient_col, date_col, validity_periods_lower, n_jobs)
+        df_scores = calc_concordance_scores(df, start_date, evaluation_length, indicators_, patient_col, date_col, validity_periods_lower, n_jobs)[0]
+        if not isinstance(meta[patient_col].dtype, pd.CategoricalDtype):
+            df_scores[patient_col] = df_scores[patient_col].astype(df_scores[patient_col].cat.categories.dtype)
+        return df_scores
+
+    # Calculate the scores and the number of activities without a date in one pass over the data
+    df_scores_all, n_missing_patients, *missing_dates = dask.compute(ddf.map_partitions(calc_concordance_partition, meta=meta), 
+                                                                     n_missing_patients, *missing_dates)
+    print_missing_dates_warning(indicators, missing_dates, date_col)
+
+    df_scores_all = df_scores_all.reset_index(drop=True)
+    if n_missing_patients > 0:
+        df_scores_all = df_scores_all.reindex(np.arange(len(df_scores_all) + 1))
 
     return df_scores_all
 
@@ -239,9 +599,10 @@ def load_validity_periods(validity_periods, validity_periods_file):
         
     if validity_periods is None:
         try:
-            with open(validity_periods_file, "r") as f:
-                validity_periods = yaml.safe_load(f)
-            validity_periods_lower = {key.lower(): value for key, value in validity_periods.items()}
+            # Parse the file only once for as long as it is not modified (keyed on the resolved path, so relative paths 
+            # and symlinks refer to the file they point to at the time of the call)
+            file_path = os.path.realpath(validity_periods_file)
+            validity_periods_lower = dict(load_validity_periods_file(file_path, os.path.getmtime(file_path)))
         except FileNotFoundError:
             raise FileNotFoundError(f"The file '{validity_periods_file}' could not be found.")
         except Exception as e:
@@ -253,7 +614,30 @@ def load_validity_periods(validity_periods, validity_periods_file):
     return validity_periods_lower
 
 
-def validate_inputs(df, evaluation_start_date, evaluation_length, indicators, patient_col, date_col, validity_periods_lower):
+@functools.lru_cache(maxsize=16)
+def load_validity_periods_file(validity_periods_file, mtime):
+    """
+    Loads the validity periods from a YAML file and returns it as a lower-case dictionary. The result is cached per 
+    file and modification time, so repeated calls do not parse the file again.
+
+    Parameters
+    ----------
+    validity_periods_file : str
+        Resolved (real) path to the YAML file containing validity periods.
+    mtime : float
+        Modification time of the file, used to invalidate the cache when the file changes.
+
+    Returns
+    -------
+    dict
+        Validity periods with lowercase keys. The dictionary is shared between calls and should not be modified.
+    """
+    with open(validity_periods_file, "r") as f:
+        validity_periods = yaml.safe_load(f)
+    return {key.lower(): value for key, value in validity_periods.items()}
+
+
+def validate_inputs(df, evaluation_start_date, evaluation_length, indicators, patient_col, date_col, validity_periods_lower, n_jobs=1):
     """
     Validates the inputs for calculating concordance scores.
 
@@ -278,13 +662,17 @@ def validate_inputs(df, evaluation_start_date, evaluation_length, indicators, pa
     validity_periods_lower : dict
         Dictionary with indicator : validity duration in days as key/value pairs.
         Keys are case-insensitive.
+    n_jobs : int, optional
+        Number of threads used for the calculation, or -1 to use all available CPUs.
+        Default: 1.
 
     Returns
     -------
     df : pandas.DataFrame
-        The validated DataFrame.
-    evaluation_start_date : pandas.Timestamp
-        The validated and converted evaluation start date as a datetime object.
+        Copy of the required columns of the validated DataFrame, with `date_col` converted to day precision and 
+        `patient_col` to categorical, sorted by patient and date. The input DataFrame is not modified.
+    evaluation_start_date : numpy.datetime64
+        The validated and converted evaluation start date as a day-precision datetime object.
     indicators : list
         Validated list of indicators (always returned as a list, even if input is a single string).
 
@@ -294,7 +682,7 @@ def validate_inputs(df, evaluation_start_date, evaluation_length, indicators, pa
         If the input DataFrame is not a pandas DataFrame or if the `indicators` parameter is not a list or string.
     ValueError
         If required columns are missing from the DataFrame, if the `evaluation_start_date` format is invalid, 
-        or if any specified indicators do not have a specified validity period.
+        if `n_jobs` is not a positive integer or -1, or if any specified indicators do not have a specified validity period.
 
         
     Notes
@@ -310,15 +698,9 @@ def validate_inputs(df, evaluation_start_date, evaluation_length, indicators, pa
     if df.empty:
         raise ValueError("The input DataFrame is empty. Please provide a valid DataFrame.")
     
-    # Convert date column to datetime
-    try:
-        df[date_col] = pd.to_datetime(df[date_col])
-    except Exception as e:
-        raise ValueError(f"Could not convert the `{date_col}` column to datetime format. Ensure it contains valid dates.") from e
-
     # Convert evaluation_start_date to datetime
     try:
-        evaluation_start_date = pd.to_datetime(evaluation_start_date, format='%Y-%m-%d')
+        evaluation_start_date = np.datetime64(pd.to_datetime(evaluation_start_date, format='%Y-%m-%d'), 'D')
     except Exception as e:
         raise ValueError(f"Invalid date format for `evaluation_start_date`: {evaluation_start_date}. Expected format: 'YYYY-MM-DD'.") from e
 
@@ -326,6 +708,10 @@ def validate_inputs(df, evaluation_start_date, evaluation_length, indicators, pa
     if not isinstance(evaluation_length, (int, float)) or evaluation_length <= 0:
         raise ValueError("The `evaluation_length` parameter must be a positive number representing the number of days.")
     
+    # Check if the number of jobs is a positive integer or -1
+    if not isinstance(n_jobs, numbers.Integral) or isinstance(n_jobs, (bool, np.bool_)) or (n_jobs < 1 and n_jobs != -1):
+        raise ValueError("The `n_jobs` parameter must be a positive integer, or -1 to use all available CPUs.")
+
     # Check if any indicators are given 
     if not indicators:
         raise ValueError("The `indicators` parameter cannot be empty. Provide at least one indicator.")
@@ -341,10 +727,45 @@ def validate_inputs(df, evaluation_start_date, evaluation_length, indicators, pa
     missing_columns = [col for col in required_columns if col not in df.columns]
     if missing_columns:
         raise ValueError(f"The following required columns are missing from the DataFrame: {missing_columns}")
+
+    # Only copy the required columns, so the original DataFrame is not modified
+    df = df[list(dict.fromkeys(required_columns))].copy()
+
+    # Convert date column to datetime
+    try:
+        df[date_col] = pd.to_datetime(df[date_col]).values.astype('datetime64[D]')
+    except Exception as e:
+        raise ValueError(f"Could not convert the `{date_col}` column to datetime format. Ensure it contains valid dates.") from e
+
+    # Convert patient identifiers to categorical, so that sorting and grouping operate on integer codes
+    df[patient_col] = df[patient_col].astype('category')
+
+    # Sort once by patient and date so that all indicators can be processed in a single sweep
+    df = df.sort_values([patient_col, date_col], kind='mergesort')
                
     # Check if all indicators have a validity period specified
     missing_indicators = [ind for ind in indicators if ind.lower() not in validity_periods_lower]
     if missing_indicators:
         raise ValueError(f"The following indicators do not have specified validity periods: {missing_indicators}")
 
-    return df, evaluation_start_date, indicators
\ No newline at end of file
+    return df, evaluation_start_date, indicators
+
+
+def print_missing_dates_warning(indicators, missing_dates, date_col):
+    """
+    Prints a warning for each indicator with activities without a date, as these are not included in the 
+    concordance score calculation.
+
+    Parameters
+    ----------
+    indicators : list of str
+        List of indicators.
+    missing_dates : list of int
+        Number of activities without a date for each indicator.
+    date_col : str
+        Name of the column with dates on which the clinical activity was performed.
+    """
+    for indicator, n_missing in zip(indicators, missing_dates):
+        if n_missing > 0:
+            print(f"WARNING: The indicator '{indicator}' has {n_missing} activities without a date in the column '{date_col}'.\n"
+                f"Activities without a date will not be included in the concordance score calculation!")
\ No newline at end of file
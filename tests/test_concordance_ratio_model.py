@@ -0,0 +1,115 @@
+import importlib.util
+import os
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import concordance_ratio_model as crm
+
+
+SAMPLE_DATA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample_data.csv')
+VALIDITY_PERIODS = {'BP': 182.5, 'Weight': 365, 'eGFR': 365}
+
+
+def load_sample_data():
+    df = pd.read_csv(SAMPLE_DATA_FILE, encoding='utf-8-sig')
+    df['Date'] = pd.to_datetime(df['Date'], format='%d/%m/%y')
+    return df
+
+
+def make_random_data(seed, n_patients=40, n_rows=400):
+    """
+    Random activity data with missing dates, missing patient identifiers, a patient without any activity and a 
+    patient whose only activities have no date.
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({'Masked_patient_id': rng.choice(['P{}'.format(i) for i in range(n_patients)], n_rows),
+                       'Date': pd.Timestamp('2020-06-01') + pd.to_timedelta(rng.integers(0, 1200, n_rows), unit='D'),
+                       'BP': rng.integers(0, 2, n_rows),
+                       'Weight': (rng.random(n_rows) < 0.1).astype(int),
+                       'eGFR': rng.choice([0, 1, np.nan], n_rows)})
+    df.loc[rng.random(n_rows) < 0.05, 'Date'] = pd.NaT
+    df.loc[rng.random(n_rows) < 0.05, 'Masked_patient_id'] = np.nan
+    df_edge_cases = pd.DataFrame({'Masked_patient_id': ['no_activity', 'no_activity', 'only_nat'], 
+                                  'Date': pd.to_datetime(['2021-05-01', '2022-02-01', None]),
+                                  'BP': [0, 0, 1], 'Weight': [0, 0, 1], 'eGFR': [0, 0, 1]})
+    return pd.concat([df, df_edge_cases], ignore_index=True)
+
+
+def calc_reference_scores(df, evaluation_start_date, evaluation_length, indicators, validity_periods):
+    """
+    Concordance scores per patient from the pandas reference implementation, `calc_ratio_of_concordant_period`.
+    """
+    validity_periods_lower = {key.lower(): value for key, value in validity_periods.items()}
+    df_valid, start_date, indicators = crm.validate_inputs(df, evaluation_start_date, evaluation_length, indicators, 
+                                                           'Masked_patient_id', 'Date', validity_periods_lower)
+    scores = {}
+    for indicator in indicators:
+        col = 'concordance_{}'.format(indicator)
+        df_score = crm.calc_ratio_of_concordant_period(df_valid, indicator, start_date, evaluation_length, 
+                                                       validity_periods_lower[indicator.lower()], 'Masked_patient_id', 'Date')
+        scores[col] = df_score.set_index(df_score['Masked_patient_id'].astype(object))[col]
+    return scores
+
+
+class TestImplementations(unittest.TestCase):
+    """
+    The compiled kernel and the NumPy fallback of `calc_days_not_concordant` must give the same scores as the pandas 
+    reference implementation.
+    """
+
+    def assert_matches_reference(self, df, evaluation_start_date, evaluation_length, indicators):
+        expected = calc_reference_scores(df, evaluation_start_date, evaluation_length, indicators, VALIDITY_PERIODS)
+        result = crm.calc_concordance_with_ratio(df, evaluation_start_date, evaluation_length, indicators, 'Masked_patient_id', 
+                                                 'Date', validity_periods=VALIDITY_PERIODS)
+        patients = result['Masked_patient_id'].astype(object)
+
+        # Rows without a patient identifier are reported once, with NaN scores
+        self.assertEqual(patients.isna().sum(), int(df['Masked_patient_id'].isna().any()))
+        self.assertTrue(result[patients.isna().to_numpy()].drop(columns='Masked_patient_id').isna().all(axis=None))
+
+        # Patients without any activity for an indicator have a NaN score, which is not part of the reference
+        self.assertCountEqual(patients.dropna(), df['Masked_patient_id'].dropna().unique())
+        for col, reference in expected.items():
+            np.testing.assert_allclose(result[col].to_numpy(), reference.reindex(patients).to_numpy(), rtol=0, atol=1e-12)
+        if len(expected) > 1:
+            total = pd.DataFrame(expected).reindex(patients).mean(axis=1)
+            np.testing.assert_allclose(result['concordance_total'].to_numpy(), total.to_numpy(), rtol=0, atol=1e-12)
+
+    def assert_all_match_reference(self):
+        for seed in range(10):
+            df = make_random_data(seed)
+            for indicators in (['BP', 'Weight', 'eGFR'], 'Weight'):
+                for evaluation_start_date, evaluation_length in (('2022-01-01', 365), ('2021-03-15', 100)):
+                    with self.subTest(seed=seed, indicators=indicators, evaluation_start_date=evaluation_start_date):
+                        self.assert_matches_reference(df, evaluation_start_date, evaluation_length, indicators)
+
+    @unittest.skipIf(crm.njit is None, "Numba is not installed")
+    def test_numba_kernel(self):
+        self.assert_all_match_reference()
+
+    def test_numpy_fallback(self):
+        with mock.patch.object(crm, 'njit', None):
+            self.assert_all_match_reference()
+
+
+@unittest.skipIf(importlib.util.find_spec('dask') is None, "Dask is not installed")
+class TestDask(unittest.TestCase):
+
+    def test_missing_patient_ids(self):
+        import dask.dataframe as dd
+
+        df = load_sample_data()
+        df.loc[::4, 'Masked_patient_id'] = np.nan
+        for indicators in (['BP', 'Weight', 'eGFR'], 'BP'):
+            expected = crm.calc_concordance_with_ratio(df, '2022-01-01', 365, indicators, 'Masked_patient_id', 'Date', 
+                                                       validity_periods=VALIDITY_PERIODS)
+            result = crm.calc_concordance_with_ratio(dd.from_pandas(df, npartitions=2), '2022-01-01', 365, indicators, 
+                                                     'Masked_patient_id', 'Date', validity_periods=VALIDITY_PERIODS)
+            pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+if __name__ == '__main__':
+    unittest.main()